@@ -1,7 +1,8 @@
 """Configuration for the LLM Council."""
 
 import os
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
 from dotenv import load_dotenv
 from .config_manager import (
     load_config,
@@ -10,9 +11,13 @@ from .config_manager import (
     DEFAULT_REASONING_EFFORT,
     DEFAULT_MODEL_REASONING_CONFIG,
     DEFAULT_AVAILABLE_MODELS,
+    DEFAULT_QUORUM_FRACTION,
 )
 
-load_dotenv()
+# Only read .env when the environment doesn't already provide the API key
+# (e.g., when a container orchestrator injects it)
+if not os.getenv("OPENROUTER_API_KEY"):
+    load_dotenv()
 
 # OpenRouter API key
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
@@ -35,33 +40,125 @@ def get_runtime_config() -> Dict[str, Any]:
             "default_reasoning_effort": DEFAULT_REASONING_EFFORT,
             "model_reasoning_config": DEFAULT_MODEL_REASONING_CONFIG,
             "available_models": DEFAULT_AVAILABLE_MODELS,
+            "quorum_fraction": DEFAULT_QUORUM_FRACTION,
         }
 
 
-def get_reasoning_config(model: str, config: Optional[Dict[str, Any]] = None) -> dict | None:
+# Sentinel for models without an explicit override
+_NO_OVERRIDE = object()
+
+
+# Wildcard rules of the model_reasoning_config dict they were found in: the
+# prefixes (each key minus its trailing "*") and their distinct lengths,
+# longest first. load_config() hands back the same dict until config.json
+# changes, so an identity check tells when to rebuild.
+_WILDCARD_RULES: Optional[Tuple[Dict[str, Any], FrozenSet[str], Tuple[int, ...]]] = None
+
+
+def _wildcard_rules(model_reasoning_config: Dict[str, Any]) -> Tuple[FrozenSet[str], Tuple[int, ...]]:
+    """Get the wildcard prefixes and their lengths for a set of override rules."""
+    global _WILDCARD_RULES
+    if _WILDCARD_RULES is None or _WILDCARD_RULES[0] is not model_reasoning_config:
+        prefixes = frozenset(
+            key[:-1] for key in model_reasoning_config
+            if isinstance(key, str) and key.endswith("*")
+        )
+        lengths = tuple(sorted({len(prefix) for prefix in prefixes}, reverse=True))
+        _WILDCARD_RULES = (model_reasoning_config, prefixes, lengths)
+    return _WILDCARD_RULES[1], _WILDCARD_RULES[2]
+
+
+def _find_override(model: str, model_reasoning_config: Dict[str, Any]) -> Any:
+    """
+    Find the reasoning override that applies to a model.
+
+    An exact model id wins. Otherwise the longest matching prefix rule
+    applies, where a key ending in "*" (e.g., "openai/*", or "*" for every
+    model) matches any model id starting with the text before the "*".
+    Only the lengths of prefixes that actually exist are probed, so configs
+    without wildcard rules skip the search entirely.
+    """
+    if model in model_reasoning_config:
+        return model_reasoning_config[model]
+    if not model_reasoning_config:
+        return _NO_OVERRIDE
+
+    prefixes, lengths = _wildcard_rules(model_reasoning_config)
+    for length in lengths:
+        if length <= len(model) and model[:length] in prefixes:
+            return model_reasoning_config[model[:length] + "*"]
+
+    return _NO_OVERRIDE
+
+
+def _resolve_reasoning_config(
+    default_reasoning_effort: Optional[str],
+    override: Any,
+) -> Optional[Mapping[str, Any]]:
+    """
+    Resolve the reasoning configuration for a model from its override.
+
+    The result is a read-only view, since every caller shares the memoized
+    object.
+    """
+    # Check for model-specific override. Anything other than a dict with a
+    # value (null, a bare string, ...) turns reasoning off for the model.
+    if override is not _NO_OVERRIDE:
+        if not isinstance(override, dict) or override.get("value") is None:
+            return None
+        return MappingProxyType(dict(override))
+
+    # Use default if no override and default is set
+    if default_reasoning_effort is not None:
+        return MappingProxyType(
+            {"param_name": "reasoning_effort", "value": default_reasoning_effort}
+        )
+
+    return None
+
+
+# Resolved reasoning configs by model id, for the (model_reasoning_config,
+# default_reasoning_effort) pair they were resolved from. Like the wildcard
+# rules, the loaded dict only changes when config.json does.
+_RESOLVED: Optional[Tuple[Any, Any, Dict[str, Optional[Mapping[str, Any]]]]] = None
+
+
+def get_reasoning_config(
+    model: str, config: Optional[Dict[str, Any]] = None
+) -> Optional[Mapping[str, Any]]:
     """
     Get the reasoning configuration for a specific model.
 
+    Overrides can target an exact model id or a prefix rule such as
+    "openai/*". Results are memoized per model for the current config, so
+    repeated lookups return the same read-only mapping.
+
     Args:
         model: The model identifier (e.g., "openai/gpt-5.2")
         config: Optional configuration snapshot to use
 
     Returns:
-        Dict with 'param_name' and 'value' keys, or None if reasoning is disabled
+        Read-only mapping with 'param_name' and 'value' keys, or None if
+        reasoning is disabled
     """
+    global _RESOLVED
     runtime_config = config or get_runtime_config()
-    model_reasoning_config = runtime_config.get("model_reasoning_config") or {}
+    model_reasoning_config = runtime_config.get("model_reasoning_config")
     default_reasoning_effort = runtime_config.get("default_reasoning_effort")
 
-    # Check for model-specific override
-    if model in model_reasoning_config:
-        model_config = model_reasoning_config[model]
-        if model_config is None or model_config.get("value") is None:
-            return None
-        return model_config
-
-    # Use default if no override and default is set
-    if default_reasoning_effort is not None:
-        return {"param_name": "reasoning_effort", "value": default_reasoning_effort}
+    resolved = _RESOLVED
+    if (resolved is None or resolved[0] is not model_reasoning_config
+            or resolved[1] != default_reasoning_effort):
+        resolved = _RESOLVED = (model_reasoning_config, default_reasoning_effort, {})
+    try:
+        return resolved[2][model]
+    except KeyError:
+        pass
 
-    return None
+    # A hand-edited config.json can hold anything here; ignore non-dict rules
+    rules = model_reasoning_config if isinstance(model_reasoning_config, dict) else {}
+    reasoning_config = _resolve_reasoning_config(
+        default_reasoning_effort, _find_override(model, rules)
+    )
+    resolved[2][model] = reasoning_config
+    return reasoning_config
@@ -22,9 +22,16 @@ DEFAULT_REASONING_EFFORT = "medium"
 DEFAULT_MODEL_REASONING_CONFIG = {
     "openai/gpt-5.2": {"param_name": "reasoning_effort", "value": "high"},
 }
+# Fraction of council models that must answer Stage 1 before moving on
+# (1.0 waits for every model)
+DEFAULT_QUORUM_FRACTION = 1.0
 
 CONFIG_FILE = "data/config.json"
 
+# Parsed config.json, reused until the file's mtime changes
+_CACHED_CONFIG: Optional[Dict[str, Any]] = None
+_CACHED_MTIME: Optional[int] = None
+
 
 def ensure_data_dir():
     """Ensure the data directory exists."""
@@ -34,24 +41,39 @@ def ensure_data_dir():
 def load_config() -> Dict[str, Any]:
     """
     Load configuration from JSON file, with fallback to defaults.
+
+    The parsed file is cached and only re-read when its modification time
+    changes. The returned dict is shared, so callers must not mutate it.
     
     Returns:
         Configuration dictionary
     """
+    global _CACHED_CONFIG, _CACHED_MTIME
+
     ensure_data_dir()
     
-    if os.path.exists(CONFIG_FILE):
+    try:
+        mtime = os.stat(CONFIG_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    if mtime is not None:
+        if mtime == _CACHED_MTIME and _CACHED_CONFIG is not None:
+            return _CACHED_CONFIG
         try:
             with open(CONFIG_FILE, 'r') as f:
                 config = json.load(f)
                 # Validate and merge with defaults
-                return {
+                _CACHED_CONFIG = {
                     "council_models": config.get("council_models", DEFAULT_COUNCIL_MODELS),
                     "chairman_model": config.get("chairman_model", DEFAULT_CHAIRMAN_MODEL),
                     "default_reasoning_effort": config.get("default_reasoning_effort", DEFAULT_REASONING_EFFORT),
                     "model_reasoning_config": config.get("model_reasoning_config", DEFAULT_MODEL_REASONING_CONFIG),
                     "available_models": config.get("available_models", DEFAULT_AVAILABLE_MODELS),
+                    "quorum_fraction": config.get("quorum_fraction", DEFAULT_QUORUM_FRACTION),
                 }
+                _CACHED_MTIME = mtime
+                return _CACHED_CONFIG
         except Exception as e:
             print(f"Warning: Failed to load config from {CONFIG_FILE}: {e}")
     
@@ -62,6 +84,7 @@ def load_config() -> Dict[str, Any]:
         "default_reasoning_effort": DEFAULT_REASONING_EFFORT,
         "model_reasoning_config": DEFAULT_MODEL_REASONING_CONFIG,
         "available_models": DEFAULT_AVAILABLE_MODELS,
+        "quorum_fraction": DEFAULT_QUORUM_FRACTION,
     }
 
 
@@ -72,6 +95,8 @@ def save_config(config: Dict[str, Any]) -> None:
     Args:
         config: Configuration dictionary to save
     """
+    global _CACHED_MTIME
+
     ensure_data_dir()
     
     # Validate configuration
@@ -85,10 +110,18 @@ def save_config(config: Dict[str, Any]) -> None:
         raise ValueError("chairman_model must be one of the council_models")
     if "available_models" in config and not isinstance(config.get("available_models"), list):
         raise ValueError("available_models must be a list")
+    quorum_fraction = config.get("quorum_fraction", DEFAULT_QUORUM_FRACTION)
+    if isinstance(quorum_fraction, bool) or not isinstance(quorum_fraction, (int, float)):
+        raise ValueError("quorum_fraction must be a number")
+    if not 0 < quorum_fraction <= 1:
+        raise ValueError("quorum_fraction must be greater than 0 and at most 1")
     
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=2)
 
+    # Force the next load_config() to re-read the file
+    _CACHED_MTIME = None
+
 
 def get_config() -> Dict[str, Any]:
     """Get current configuration."""
@@ -105,7 +138,7 @@ def update_config(updates: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Updated configuration dictionary
     """
-    current = load_config()
+    current = dict(load_config())
     current.update(updates)
     save_config(current)
     return current
@@ -1,15 +1,50 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple, Optional
-from .openrouter import query_models_parallel, query_model, build_multimodal_content
-from .config_manager import load_config
+import math
+import re
+from typing import Callable, List, Dict, Any, Tuple, Optional
+from .openrouter import query_models_parallel, query_model, build_image_parts, build_multimodal_content
+from .config_manager import load_config, DEFAULT_QUORUM_FRACTION
+
+# Ranking patterns, compiled once. Both are linear-time: no nested or
+# overlapping quantifiers that could backtrack on odd model output.
+# Numbered list entry (e.g., "1. Response A"), capturing just the label
+_NUMBERED_RANKING_RE = re.compile(r'\d+\.\s*(Response [A-Z])')
+# Any response label
+_RESPONSE_LABEL_RE = re.compile(r'Response [A-Z]')
+
+
+def stage1_quorum(num_models: int, config: Dict[str, Any]) -> int:
+    """
+    Number of Stage 1 answers needed before moving on to Stage 2, so that
+    one slow model doesn't hold up the whole council.
+
+    quorum_fraction is only validated when saved through the API, so a
+    hand-edited config.json can hold anything: non-numeric values fall back
+    to DEFAULT_QUORUM_FRACTION and the result is clamped to [1, num_models].
+
+    Args:
+        num_models: Number of council models queried
+        config: Configuration snapshot with 'quorum_fraction'
+
+    Returns:
+        How many successful responses make a quorum
+    """
+    quorum_fraction = config.get("quorum_fraction", DEFAULT_QUORUM_FRACTION)
+    if (isinstance(quorum_fraction, bool)
+            or not isinstance(quorum_fraction, (int, float))
+            or math.isnan(quorum_fraction)):
+        quorum_fraction = DEFAULT_QUORUM_FRACTION
+    quorum_fraction = min(max(quorum_fraction, 0.0), 1.0)
+    return min(max(math.ceil(num_models * quorum_fraction), 1), num_models)
 
 
 async def stage1_collect_responses(
     user_query: str,
     images: Optional[List[str]] = None,
     council_models: Optional[List[str]] = None,
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Dict[str, Any]] = None,
+    image_parts: Optional[List[Dict[str, Any]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Stage 1: Collect individual responses from all council models.
@@ -17,18 +52,23 @@ async def stage1_collect_responses(
     Args:
         user_query: The user's question
         images: Optional list of base64 image data URLs
+        image_parts: Optional image entries prebuilt for the turn with
+            build_image_parts(images), shared by every stage
 
     Returns:
         List of dicts with 'model' and 'response' keys
     """
-    content = build_multimodal_content(user_query, images)
+    content = build_multimodal_content(user_query, images, image_parts)
     messages = [{"role": "user", "content": content}]
 
     runtime_config = config or load_config()
     models = council_models or runtime_config["council_models"]
 
-    # Query all models in parallel
-    responses = await query_models_parallel(models, messages, config=runtime_config)
+    # Query all models in parallel, moving on once a quorum has answered
+    responses = await query_models_parallel(
+        models, messages, config=runtime_config,
+        stop_after=stage1_quorum(len(models), runtime_config)
+    )
 
     # Format results
     stage1_results = []
@@ -36,7 +76,7 @@ async def stage1_collect_responses(
         if response is not None:  # Only include successful responses
             stage1_results.append({
                 "model": model,
-                "response": response.get('content', '')
+                "response": response.content or ''
             })
 
     return stage1_results
@@ -116,7 +156,8 @@ async def stage2_collect_rankings(
     stage1_results: List[Dict[str, Any]],
     images: Optional[List[str]] = None,
     council_models: Optional[List[str]] = None,
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Dict[str, Any]] = None,
+    image_parts: Optional[List[Dict[str, Any]]] = None
 ) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
     """
     Stage 2: Each model ranks the anonymized responses.
@@ -125,13 +166,15 @@ async def stage2_collect_rankings(
         user_query: The original user query
         stage1_results: Results from Stage 1
         images: Optional list of base64 image data URLs (for context)
+        image_parts: Optional image entries prebuilt for the turn with
+            build_image_parts(images), shared by every stage
 
     Returns:
         Tuple of (rankings list, label_to_model mapping)
     """
     ranking_prompt, label_to_model = build_stage2_prompt(user_query, stage1_results, images)
 
-    content = build_multimodal_content(ranking_prompt, images)
+    content = build_multimodal_content(ranking_prompt, images, image_parts)
     messages = [{"role": "user", "content": content}]
 
     runtime_config = config or load_config()
@@ -144,7 +187,7 @@ async def stage2_collect_rankings(
     stage2_results = []
     for model, response in responses.items():
         if response is not None:
-            full_text = response.get('content', '')
+            full_text = response.content or ''
             parsed = parse_ranking_from_text(full_text)
             stage2_results.append({
                 "model": model,
@@ -161,7 +204,9 @@ async def stage3_synthesize_final(
     stage2_results: List[Dict[str, Any]],
     images: Optional[List[str]] = None,
     chairman_model: Optional[str] = None,
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Dict[str, Any]] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    image_parts: Optional[List[Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
@@ -171,6 +216,10 @@ async def stage3_synthesize_final(
         stage1_results: Individual model responses from Stage 1
         stage2_results: Rankings from Stage 2
         images: Optional list of base64 image data URLs (for context)
+        on_chunk: Optional callback that streams the chairman's answer,
+            receiving each piece of text as it arrives
+        image_parts: Optional image entries prebuilt for the turn with
+            build_image_parts(images), shared by every stage
 
     Returns:
         Dict with 'model' and 'response' keys
@@ -207,14 +256,17 @@ Your task as Chairman is to synthesize all of this information into a single, co
 
 Provide a clear, well-reasoned final answer that represents the council's collective wisdom:"""
 
-    content = build_multimodal_content(chairman_prompt, images)
+    content = build_multimodal_content(chairman_prompt, images, image_parts)
     messages = [{"role": "user", "content": content}]
 
     runtime_config = config or load_config()
     chairman = chairman_model or runtime_config["chairman_model"]
 
     # Query the chairman model
-    response = await query_model(chairman, messages, config=runtime_config)
+    response = await query_model(
+        chairman, messages, config=runtime_config, has_images=bool(images),
+        on_chunk=on_chunk
+    )
 
     if response is None:
         # Fallback if chairman fails
@@ -225,7 +277,7 @@ Provide a clear, well-reasoned final answer that represents the council's collec
 
     return {
         "model": chairman,
-        "response": response.get('content', '')
+        "response": response.content or ''
     }
 
 
@@ -239,8 +291,6 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
     Returns:
         List of response labels in ranked order
     """
-    import re
-
     # Look for "FINAL RANKING:" section
     if "FINAL RANKING:" in ranking_text:
         # Extract everything after "FINAL RANKING:"
@@ -249,17 +299,17 @@ def parse_ranking_from_text(ranking_text: str) -> List[str]:
             ranking_section = parts[1]
             # Try to extract numbered list format (e.g., "1. Response A")
             # This pattern looks for: number, period, optional space, "Response X"
-            numbered_matches = re.findall(r'\d+\.\s*Response [A-Z]', ranking_section)
+            # The capture group yields just the "Response X" part
+            numbered_matches = _NUMBERED_RANKING_RE.findall(ranking_section)
             if numbered_matches:
-                # Extract just the "Response X" part
-                return [re.search(r'Response [A-Z]', m).group() for m in numbered_matches]
+                return numbered_matches
 
             # Fallback: Extract all "Response X" patterns in order
-            matches = re.findall(r'Response [A-Z]', ranking_section)
+            matches = _RESPONSE_LABEL_RE.findall(ranking_section)
             return matches
 
     # Fallback: try to find any "Response X" patterns in order
-    matches = re.findall(r'Response [A-Z]', ranking_text)
+    matches = _RESPONSE_LABEL_RE.findall(ranking_text)
     return matches
 
 
@@ -310,12 +360,16 @@ def calculate_aggregate_rankings(
     return aggregate
 
 
-async def generate_conversation_title(user_query: str) -> str:
+async def generate_conversation_title(
+    user_query: str,
+    config: Optional[Dict[str, Any]] = None
+) -> str:
     """
     Generate a short title for a conversation based on the first user message.
 
     Args:
         user_query: The first user message
+        config: Optional configuration snapshot to use
 
     Returns:
         A short title (3-5 words)
@@ -330,13 +384,15 @@ Title:"""
     messages = [{"role": "user", "content": title_prompt}]
 
     # Use gemini-2.5-flash for title generation (fast and cheap)
-    response = await query_model("google/gemini-2.5-flash", messages, timeout=30.0)
+    response = await query_model(
+        "google/gemini-2.5-flash", messages, timeout=30.0, config=config, has_images=False
+    )
 
     if response is None:
         # Fallback to a generic title
         return "New Conversation"
 
-    title = response.get('content', 'New Conversation').strip()
+    title = (response.content or 'New Conversation').strip()
 
     # Clean up the title - remove quotes, limit length
     title = title.strip('"\'')
@@ -364,13 +420,16 @@ async def run_full_council(
         Tuple of (stage1_results, stage2_results, stage3_result, metadata)
     """
     runtime_config = config or load_config()
+    # Every stage attaches the same images, so build their entries once
+    image_parts = build_image_parts(images)
 
     # Stage 1: Collect individual responses
     stage1_results = await stage1_collect_responses(
         user_query,
         images,
         council_models=runtime_config["council_models"],
-        config=runtime_config
+        config=runtime_config,
+        image_parts=image_parts
     )
 
     # If no models responded successfully, return error
@@ -386,7 +445,8 @@ async def run_full_council(
         stage1_results,
         images,
         council_models=runtime_config["council_models"],
-        config=runtime_config
+        config=runtime_config,
+        image_parts=image_parts
     )
 
     # Calculate aggregate rankings
@@ -399,7 +459,8 @@ async def run_full_council(
         stage2_results,
         images,
         chairman_model=runtime_config["chairman_model"],
-        config=runtime_config
+        config=runtime_config,
+        image_parts=image_parts
     )
 
     # Prepare metadata
@@ -1,37 +1,73 @@
 """FastAPI backend for LLM Council."""
 
+import atexit
 import logging
-from fastapi import FastAPI, HTTPException
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from contextlib import aclosing, asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
 import uuid
-import json
 import asyncio
+import msgspec
+import orjson
 
 from . import storage
-from .council import run_full_council, generate_conversation_title, stage3_synthesize_final, calculate_aggregate_rankings, parse_ranking_from_text, build_stage2_prompt
-from .openrouter import query_model, build_multimodal_content
+from .council import run_full_council, generate_conversation_title, stage1_quorum, stage3_synthesize_final, calculate_aggregate_rankings, parse_ranking_from_text, build_stage2_prompt
+from .openrouter import query_models_streaming, build_image_parts, build_multimodal_content, close_client
 from .config_manager import get_config, update_config
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)-8s | %(message)s",
+# Configure logging. Records are handed to a queue on the event loop and
+# written to stderr by a background listener thread, so logging never
+# blocks the loop on I/O.
+_log_queue: SimpleQueue = SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter(
+    "%(asctime)s | %(levelname)-8s | %(message)s",
     datefmt="%H:%M:%S"
-)
+))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.root.addHandler(QueueHandler(_log_queue))
+logging.root.setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Suppress noisy httpx logs (we have our own request/response logging)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-app = FastAPI(title="LLM Council API")
 
-# Enable CORS for local development
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the shared OpenRouter client when the server shuts down."""
+    yield
+    await close_client()
+
+
+app = FastAPI(title="LLM Council API", lifespan=lifespan, default_response_class=OrjsonResponse)
+
+# Enable CORS for local development. The usual dev origins are listed
+# explicitly so they hit Starlette's set lookup; the regex only runs for
+# other local ports.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://localhost:3000"],
+    allow_origins=[
+        "http://localhost:5173",
+        "http://localhost:3000",
+        "http://127.0.0.1:5173",
+        "http://127.0.0.1:3000",
+    ],
     allow_origin_regex=r"https?://(localhost|127\.0\.0\.1)(:\d+)?",
     allow_credentials=True,
     allow_methods=["*"],
@@ -39,31 +75,36 @@ app.add_middleware(
 )
 
 
+def sse(event: Dict[str, Any]) -> bytes:
+    """Encode an event as a Server-Sent Events data frame."""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
 class CreateConversationRequest(BaseModel):
     """Request to create a new conversation."""
     pass
 
 
-class SendMessageRequest(BaseModel):
+class SendMessageRequest(msgspec.Struct):
     """Request to send a message in a conversation."""
     content: str
-    images: List[str] = []  # Base64 data URLs (e.g., "data:image/png;base64,...")
+    # Base64 data URLs (e.g., "data:image/png;base64,..."). Kept as str: they
+    # are stored in conversation JSON and embedded in outbound messages, and
+    # encode_messages() already turns them into bytes once per stage.
+    images: List[str] = []
 
 
-class ConversationMetadata(BaseModel):
-    """Conversation metadata for list view."""
-    id: str
-    created_at: str
-    title: str
-    message_count: int
-
+async def parse_send_message_request(http_request: Request) -> SendMessageRequest:
+    """
+    Decode a SendMessageRequest straight from the raw request body.
 
-class Conversation(BaseModel):
-    """Full conversation with all messages."""
-    id: str
-    created_at: str
-    title: str
-    messages: List[Dict[str, Any]]
+    msgspec parses and validates in one pass, which matters for bodies that
+    carry several large base64 images.
+    """
+    try:
+        return msgspec.json.decode(await http_request.body(), type=SendMessageRequest)
+    except (msgspec.DecodeError, msgspec.ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @app.get("/")
@@ -72,31 +113,38 @@ async def root():
     return {"status": "ok", "service": "LLM Council API"}
 
 
-@app.get("/api/conversations", response_model=List[ConversationMetadata])
+# Conversation payloads are plain dicts straight from storage, so they are
+# returned as OrjsonResponse instances to skip FastAPI's validation and
+# jsonable_encoder passes over every message.
+
+@app.get("/api/conversations")
 async def list_conversations():
     """List all conversations (metadata only)."""
-    return storage.list_conversations()
+    return OrjsonResponse(storage.list_conversations())
 
 
-@app.post("/api/conversations", response_model=Conversation)
+@app.post("/api/conversations")
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
     conversation_id = str(uuid.uuid4())
     conversation = storage.create_conversation(conversation_id)
-    return conversation
+    return OrjsonResponse(conversation)
 
 
-@app.get("/api/conversations/{conversation_id}", response_model=Conversation)
+@app.get("/api/conversations/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Get a specific conversation with all its messages."""
     conversation = storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    return conversation
+    return OrjsonResponse(conversation)
 
 
 @app.post("/api/conversations/{conversation_id}/message")
-async def send_message(conversation_id: str, request: SendMessageRequest):
+async def send_message(
+    conversation_id: str,
+    request: SendMessageRequest = Depends(parse_send_message_request)
+):
     """
     Send a message and run the 3-stage council process.
     Returns the complete response with all stages.
@@ -110,19 +158,16 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     is_first_message = len(conversation["messages"]) == 0
     image_count = len(request.images) if request.images else 0
     
-    logger.info(f"New message in {conversation_id[:8]}... (images: {image_count}, first: {is_first_message})")
-    logger.info(f"Query: {request.content[:100]}{'...' if len(request.content) > 100 else ''}")
+    logger.info("New message in %.8s... (images: %d, first: %s)", conversation_id, image_count, is_first_message)
+    logger.info("Query: %.100s%s", request.content, "..." if len(request.content) > 100 else "")
 
-    # Add user message (with images if present)
-    storage.add_user_message(conversation_id, request.content, request.images)
+    config_snapshot = get_config()
 
     # If this is the first message, generate a title
     if is_first_message:
-        title = await generate_conversation_title(request.content)
+        title = await generate_conversation_title(request.content, config=config_snapshot)
         storage.update_conversation_title(conversation_id, title)
-        logger.info(f"Generated title: {title}")
-
-    config_snapshot = get_config()
+        logger.info("Generated title: %s", title)
 
     # Run the 3-stage council process (with images)
     logger.info("Starting 3-stage council process...")
@@ -131,25 +176,30 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
     )
     logger.info("Council process complete")
 
-    # Add assistant message with all stages
-    storage.add_assistant_message(
+    # Save the user message (with images if present) and all stages together
+    storage.add_turn(
         conversation_id,
+        request.content,
+        request.images,
         stage1_results,
         stage2_results,
         stage3_result
     )
 
     # Return the complete response with metadata
-    return {
+    return OrjsonResponse({
         "stage1": stage1_results,
         "stage2": stage2_results,
         "stage3": stage3_result,
         "metadata": metadata
-    }
+    })
 
 
 @app.post("/api/conversations/{conversation_id}/message/stream")
-async def send_message_stream(conversation_id: str, request: SendMessageRequest):
+async def send_message_stream(
+    conversation_id: str,
+    request: SendMessageRequest = Depends(parse_send_message_request)
+):
     """
     Send a message and stream the 3-stage council process.
     Returns Server-Sent Events as each stage completes.
@@ -166,62 +216,69 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
     images = request.images if request.images else None
     image_count = len(images) if images else 0
     
-    logger.info(f"[STREAM] New message in {conversation_id[:8]}... (images: {image_count}, first: {is_first_message})")
-    logger.info(f"[STREAM] Query: {request.content[:100]}{'...' if len(request.content) > 100 else ''}")
+    logger.info("[STREAM] New message in %.8s... (images: %d, first: %s)", conversation_id, image_count, is_first_message)
+    logger.info("[STREAM] Query: %.100s%s", request.content, "..." if len(request.content) > 100 else "")
 
     config_snapshot = get_config()
     council_models = config_snapshot["council_models"]
     chairman_model = config_snapshot["chairman_model"]
 
-    async def event_generator():
+    async def run_council(emit):
+        """Run the council for this turn, passing each SSE event to emit()."""
+        title_task = None
         try:
-            # Add user message (with images if present)
-            storage.add_user_message(conversation_id, request.content, request.images)
-
             # Start title generation in parallel (don't await yet)
-            title_task = None
             if is_first_message:
-                title_task = asyncio.create_task(generate_conversation_title(request.content))
+                title_task = asyncio.create_task(generate_conversation_title(request.content, config=config_snapshot))
 
             # Stage 1: Collect responses (with images) - stream individual responses
             logger.info("[STREAM] Stage 1: Collecting individual responses...")
             
             # Send start event with list of pending models
-            yield f"data: {json.dumps({'type': 'stage1_start', 'models': council_models})}\n\n"
+            emit({'type': 'stage1_start', 'models': council_models})
             
             # Build multimodal content for the query
-            content = build_multimodal_content(request.content, images)
+            # Every stage attaches the same images, so build their entries once
+            image_parts = build_image_parts(images)
+            content = build_multimodal_content(request.content, images, image_parts)
             messages = [{"role": "user", "content": content}]
+
+            # Move on to Stage 2 once a quorum of models has answered, rather
+            # than letting one slow model hold up the whole council
+            quorum = stage1_quorum(len(council_models), config_snapshot)
             
-            # Create tasks for all models
-            async def query_model_with_name(model):
-                """Query a model and return (model, response) tuple."""
-                response = await query_model(model, messages, config=config_snapshot)
-                return (model, response)
-            
-            # Start all queries in parallel
-            tasks = [asyncio.create_task(query_model_with_name(model)) for model in council_models]
-            
-            # Collect results as they complete
+            # Collect results as they complete. Closing the stream cancels
+            # any requests still in flight if the turn is abandoned.
             stage1_results = []
-            for coro in asyncio.as_completed(tasks):
-                model, response = await coro
-                if response is not None:
-                    result = {
-                        "model": model,
-                        "response": response.get('content', '')
-                    }
-                    stage1_results.append(result)
-                    logger.info(f"[STREAM] Stage 1: {model} responded")
-                    # Emit individual response event
-                    yield f"data: {json.dumps({'type': 'stage1_response', 'data': result})}\n\n"
-                else:
-                    logger.warning(f"[STREAM] Stage 1: {model} failed")
-                    # Emit failure event so frontend knows this model won't respond
-                    yield f"data: {json.dumps({'type': 'stage1_response', 'data': {'model': model, 'response': None, 'failed': True}})}\n\n"
+            answered = set()
+            async with aclosing(query_models_streaming(
+                council_models, messages, config=config_snapshot, has_images=images is not None,
+                stop_after=quorum
+            )) as responses:
+                async for model, response in responses:
+                    answered.add(model)
+                    if response is not None:
+                        result = {
+                            "model": model,
+                            "response": response.content or ''
+                        }
+                        stage1_results.append(result)
+                        logger.info("[STREAM] Stage 1: %s responded", model)
+                        # Emit individual response event
+                        emit({'type': 'stage1_response', 'data': result})
+                    else:
+                        logger.warning("[STREAM] Stage 1: %s failed", model)
+                        # Emit failure event so frontend knows this model won't respond
+                        emit({'type': 'stage1_response', 'data': {'model': model, 'response': None, 'failed': True}})
+
+            # Report stragglers that were cut off once the quorum was reached
+            for model in council_models:
+                if model not in answered:
+                    logger.warning("[STREAM] Stage 1: %s cancelled after quorum", model)
+                    emit({'type': 'stage1_response', 'data': {'model': model, 'response': None, 'cancelled': True}})
             
-            logger.info(f"[STREAM] Stage 1 complete: {len(stage1_results)} responses")
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
+            logger.info("[STREAM] Stage 1 complete: %d responses", len(stage1_results))
+            emit({'type': 'stage1_complete', 'data': stage1_results})
 
             # Stage 2: Collect rankings (with images for context) - stream individual rankings
             logger.info("[STREAM] Stage 2: Collecting peer rankings...")
@@ -230,72 +287,70 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
             ranking_prompt, label_to_model = build_stage2_prompt(request.content, stage1_results, images)
             
             # Send start event with pending models and label mapping
-            yield f"data: {json.dumps({'type': 'stage2_start', 'models': council_models, 'metadata': {'label_to_model': label_to_model}})}\n\n"
+            emit({'type': 'stage2_start', 'models': council_models, 'metadata': {'label_to_model': label_to_model}})
             
             # Build multimodal content for ranking
-            ranking_content = build_multimodal_content(ranking_prompt, images)
+            ranking_content = build_multimodal_content(ranking_prompt, images, image_parts)
             ranking_messages = [{"role": "user", "content": ranking_content}]
             
-            # Create tasks for all models
-            async def query_ranking_with_name(model):
-                """Query a model for ranking and return (model, response) tuple."""
-                response = await query_model(model, ranking_messages, config=config_snapshot)
-                return (model, response)
-            
-            # Start all ranking queries in parallel
-            ranking_tasks = [asyncio.create_task(query_ranking_with_name(model)) for model in council_models]
-            
             # Collect results as they complete
             stage2_results = []
-            for coro in asyncio.as_completed(ranking_tasks):
-                model, response = await coro
-                if response is not None:
-                    full_text = response.get('content', '')
-                    parsed = parse_ranking_from_text(full_text)
-                    result = {
-                        "model": model,
-                        "ranking": full_text,
-                        "parsed_ranking": parsed
-                    }
-                    stage2_results.append(result)
-                    logger.info(f"[STREAM] Stage 2: {model} ranked")
-                    # Emit individual ranking event
-                    yield f"data: {json.dumps({'type': 'stage2_response', 'data': result})}\n\n"
-                else:
-                    logger.warning(f"[STREAM] Stage 2: {model} failed")
-                    # Emit failure event
-                    yield f"data: {json.dumps({'type': 'stage2_response', 'data': {'model': model, 'ranking': None, 'failed': True}})}\n\n"
+            async with aclosing(query_models_streaming(
+                council_models, ranking_messages, config=config_snapshot, has_images=images is not None
+            )) as rankings:
+                async for model, response in rankings:
+                    if response is not None:
+                        full_text = response.content or ''
+                        parsed = parse_ranking_from_text(full_text)
+                        result = {
+                            "model": model,
+                            "ranking": full_text,
+                            "parsed_ranking": parsed
+                        }
+                        stage2_results.append(result)
+                        logger.info("[STREAM] Stage 2: %s ranked", model)
+                        # Emit individual ranking event
+                        emit({'type': 'stage2_response', 'data': result})
+                    else:
+                        logger.warning("[STREAM] Stage 2: %s failed", model)
+                        # Emit failure event
+                        emit({'type': 'stage2_response', 'data': {'model': model, 'ranking': None, 'failed': True}})
             
             # Calculate aggregate rankings
             aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
             
-            logger.info(f"[STREAM] Stage 2 complete: {len(stage2_results)} rankings")
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
+            logger.info("[STREAM] Stage 2 complete: %d rankings", len(stage2_results))
+            emit({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})
 
             # Stage 3: Synthesize final answer (with images for context)
             logger.info("[STREAM] Stage 3: Synthesizing final response...")
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
+            emit({'type': 'stage3_start', 'model': chairman_model})
+            # Stream the chairman's answer to the client as it is written
             stage3_result = await stage3_synthesize_final(
                 request.content,
                 stage1_results,
                 stage2_results,
                 images,
                 chairman_model=chairman_model,
-                config=config_snapshot
+                config=config_snapshot,
+                image_parts=image_parts,
+                on_chunk=lambda text: emit({'type': 'stage3_chunk', 'data': {'model': chairman_model, 'delta': text}})
             )
             logger.info("[STREAM] Stage 3 complete")
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
+            emit({'type': 'stage3_complete', 'data': stage3_result})
 
             # Wait for title generation if it was started
             if title_task:
                 title = await title_task
                 storage.update_conversation_title(conversation_id, title)
-                logger.info(f"[STREAM] Generated title: {title}")
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
+                logger.info("[STREAM] Generated title: %s", title)
+                emit({'type': 'title_complete', 'data': {'title': title}})
 
-            # Save complete assistant message
-            storage.add_assistant_message(
+            # Save the user message (with images if present) and all stages together
+            storage.add_turn(
                 conversation_id,
+                request.content,
+                request.images,
                 stage1_results,
                 stage2_results,
                 stage3_result
@@ -303,12 +358,51 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
 
             # Send completion event
             logger.info("[STREAM] Council process complete")
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            emit({'type': 'complete'})
 
         except Exception as e:
-            logger.error(f"[STREAM] Error: {type(e).__name__}: {e}")
+            logger.error("[STREAM] Error: %s: %s", type(e).__name__, e)
             # Send error event
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            emit({'type': 'error', 'message': str(e)})
+        finally:
+            # Don't leave the title request running if the turn is abandoned
+            # (e.g. the client disconnects)
+            if title_task is not None:
+                title_task.cancel()
+
+    async def event_generator():
+        # The council runs in its own task and hands events over through a
+        # queue, so model fan-outs never wait for the client to read a frame
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                await run_council(queue.put_nowait)
+            finally:
+                queue.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                # Coalesce every event that is already queued (e.g., several
+                # models finishing in the same loop tick) into one chunk, so
+                # they go out in a single send instead of one per frame
+                events = [await queue.get()]
+                while not queue.empty():
+                    events.append(queue.get_nowait())
+                # The None sentinel is always the last event produced
+                finished = events[-1] is None
+                frames = b"".join(sse(event) for event in events if event is not None)
+                if frames:
+                    yield frames
+                if finished:
+                    break
+            await producer
+        finally:
+            # Stop the council if the client went away mid-stream
+            if not producer.done():
+                logger.info("[STREAM] Client disconnected, cancelling council")
+                producer.cancel()
 
     return StreamingResponse(
         event_generator(),
@@ -327,12 +421,31 @@ class UpdateConfigRequest(BaseModel):
     default_reasoning_effort: Optional[str] = None
     model_reasoning_config: Optional[Dict[str, Any]] = None
     available_models: Optional[List[str]] = None
+    quorum_fraction: Optional[float] = None
+
+
+# Encoded GET /api/config body and its ETag, together with the config dict
+# they were built from. load_config() hands back the same dict until
+# config.json changes, so an identity check tells when to rebuild.
+_CONFIG_RESPONSE: Optional[Tuple[Dict[str, Any], bytes, str]] = None
 
 
 @app.get("/api/config")
-async def get_configuration():
+async def get_configuration(http_request: Request):
     """Get current configuration."""
-    return get_config()
+    global _CONFIG_RESPONSE
+    config = get_config()
+    if _CONFIG_RESPONSE is None or _CONFIG_RESPONSE[0] is not config:
+        body = orjson.dumps(config)
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        _CONFIG_RESPONSE = (config, body, etag)
+    _, body, etag = _CONFIG_RESPONSE
+
+    # Let the browser revalidate on every load; unchanged config costs a 304
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.put("/api/config")
@@ -352,6 +465,8 @@ async def update_configuration(request: UpdateConfigRequest):
         updates["model_reasoning_config"] = request.model_reasoning_config
     if "available_models" in provided_fields:
         updates["available_models"] = request.available_models
+    if "quorum_fraction" in provided_fields:
+        updates["quorum_fraction"] = request.quorum_fraction
     
     try:
         updated_config = update_config(updates)
@@ -360,10 +475,17 @@ async def update_configuration(request: UpdateConfigRequest):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Failed to update configuration: {e}")
+        logger.error("Failed to update configuration: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # uvicorn[standard] installs uvloop, and uvicorn's default loop="auto"
+    # runs on it wherever it is available (everywhere but Windows), so the
+    # council fan-outs already get the faster loop without installing a
+    # policy here.
+    # log_config=None keeps uvicorn from installing its own stderr handlers,
+    # so its server and access logs propagate to the root queue handler
+    # above instead of writing on the event loop.
+    uvicorn.run(app, host="0.0.0.0", port=8001, log_config=None)
@@ -1,11 +1,19 @@
 """OpenRouter API client for making LLM requests."""
 
+import asyncio
 import httpx
 import logging
-import time
-from typing import List, Dict, Any, Optional, Union
+import orjson
+import random
+from typing import AsyncIterator, Callable, List, Dict, Any, Mapping, NamedTuple, Optional, Tuple, Union
 from .config import OPENROUTER_API_KEY, OPENROUTER_API_URL, get_reasoning_config
 
+try:
+    import h2  # noqa: F401 - httpx needs it for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -23,151 +31,511 @@ class Colors:
     INFO = "\033[96m"      # Cyan - general info
     MODEL = "\033[95m"     # Magenta - model names
 
+# Log templates, colored once at import. Callers pass the dynamic fields as
+# logger arguments, so formatting only happens when a record is emitted.
+REASONING_TMPL = f"{Colors.INFO}[%s] Reasoning: %s=%s{Colors.RESET}"
+SEND_TMPL = f"{Colors.SEND}>>> [%s] SENDING request (images: %s, timeout: %.1fs){Colors.RESET}"
+RECV_TMPL = f"{Colors.RECV}<<< [%s] RECEIVED in %.2fs (chars: %d, reasoning: %s){Colors.RESET}"
+TIMEOUT_TMPL = f"{Colors.ERROR}!!! [%s] TIMEOUT after %.2fs{Colors.RESET}"
+HTTP_ERROR_TMPL = f"{Colors.ERROR}!!! [%s] HTTP %d after %.2fs: %s{Colors.RESET}"
+ERROR_TMPL = f"{Colors.ERROR}!!! [%s] ERROR after %.2fs: %s: %s{Colors.RESET}"
+NO_MESSAGES_TMPL = f"{Colors.ERROR}!!! [%s] No messages to send{Colors.RESET}"
+RETRY_TMPL = f"{Colors.ERROR}!!! [%s] %s after %.2fs, retrying in %.2fs (%d/%d){Colors.RESET}"
+BANNER_TMPL = f"{Colors.INFO}{'=' * 60}{Colors.RESET}"
+PARALLEL_START_TMPL = f"{Colors.INFO}Querying %d models in parallel{Colors.RESET}"
+PARALLEL_PROGRESS_TMPL = "Parallel query progress: %d/%d done (latest: %s, %d succeeded)"
+PARALLEL_DONE_TMPL = f"{Colors.INFO}Parallel query complete in %.2fs (%d/%d succeeded){Colors.RESET}"
+
 # Type for message content - can be string or multimodal array
 MessageContent = Union[str, List[Dict[str, Any]]]
 
 
-def build_multimodal_content(text: str, images: Optional[List[str]] = None) -> MessageContent:
+class ModelResponse(NamedTuple):
+    """A successful model reply."""
+    content: Optional[str]
+    reasoning_details: Optional[Any] = None
+
+
+# Connection setup gets a short limit of its own, so an unreachable host
+# fails fast instead of using up the whole request timeout
+CONNECT_TIMEOUT = 10.0
+
+# Shared HTTP client so connections to OpenRouter are pooled across requests,
+# and the event loop it was created on (httpx clients are bound to one loop)
+_CLIENT: Optional[httpx.AsyncClient] = None
+_CLIENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_client() -> httpx.AsyncClient:
+    """
+    Get the shared OpenRouter HTTP client, creating it on first use.
+
+    A new client is created if the previous one was closed or belongs to a
+    different event loop (e.g., after a reload or across asyncio.run calls).
+
+    Returns:
+        An httpx.AsyncClient with keep-alive connection pooling (and HTTP/2
+        when the h2 package is installed)
+    """
+    global _CLIENT, _CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _CLIENT is None or _CLIENT.is_closed or _CLIENT_LOOP is not loop:
+        # Over HTTP/2 the parallel council requests share one connection as
+        # multiplexed streams; fall back to HTTP/1.1 pooling without h2
+        _CLIENT = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            # Sent with every request; set once here rather than per call
+            headers={
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(120.0, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_keepalive_connections=64,
+                max_connections=128,
+                keepalive_expiry=60.0,
+            ),
+        )
+        _CLIENT_LOOP = loop
+    return _CLIENT
+
+
+async def close_client() -> None:
+    """Close the shared HTTP client, if one was created."""
+    global _CLIENT, _CLIENT_LOOP
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+        _CLIENT_LOOP = None
+
+
+# Statuses worth retrying: request timeouts, rate limits and upstream
+# provider hiccups. Anything else is treated as a permanent failure.
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Upper bound on a single retry wait, in seconds
+MAX_RETRY_DELAY = 30.0
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """
+    Work out how long to wait before retrying a failed request.
+
+    Honors a numeric Retry-After header when the server sends one, and
+    otherwise backs off exponentially with jitter so that the council's
+    parallel requests don't all retry at the same moment.
+
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+        response: The failed response, if the server answered at all
+
+    Returns:
+        Delay in seconds, capped at MAX_RETRY_DELAY
+    """
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), MAX_RETRY_DELAY)
+            except ValueError:
+                pass  # HTTP-date form; fall back to our own backoff
+    return min(2 ** attempt + random.uniform(0, 0.5), MAX_RETRY_DELAY)
+
+
+def build_image_parts(images: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Build the image entries of a multimodal content array.
+
+    Every stage of a turn sends the same images with different text, so
+    callers build these once per turn and pass them to each
+    build_multimodal_content() call. The entries are shared between stages;
+    callers must not mutate them.
+
+    Args:
+        images: Optional list of base64 data URLs
+
+    Returns:
+        List of image_url content parts (empty if there are no images)
+    """
+    return [{"type": "image_url", "image_url": {"url": image_url}} for image_url in images or ()]
+
+
+def build_multimodal_content(
+    text: str,
+    images: Optional[List[str]] = None,
+    image_parts: Optional[List[Dict[str, Any]]] = None
+) -> MessageContent:
     """
     Build multimodal message content with text and optional images.
     
     Args:
         text: The text content of the message
         images: Optional list of base64 data URLs (e.g., "data:image/png;base64,...")
+        image_parts: Optional entries already built from images with
+            build_image_parts(), to share them across a turn's stages
     
     Returns:
         Either a plain string (if no images) or a multimodal content array
     """
     if not images:
         return text
+    if image_parts is None:
+        image_parts = build_image_parts(images)
     
     # Build multimodal content array
-    content: List[Dict[str, Any]] = [{"type": "text", "text": text}]
-    
-    for image_url in images:
-        content.append({
-            "type": "image_url",
-            "image_url": {"url": image_url}
-        })
-    
-    return content
+    return [{"type": "text", "text": text}, *image_parts]
+
+
+def _has_images(messages: List[Dict[str, Any]]) -> bool:
+    """Check whether any message carries an image part."""
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, list):
+            for part in content:
+                if part.get('type') == 'image_url':
+                    return True
+    return False
+
+
+def encode_messages(messages: List[Dict[str, Any]]) -> bytes:
+    """
+    Serialize a messages list to JSON once, so it can be shared by the
+    requests of a fan-out that send the same messages to several models.
+
+    Args:
+        messages: List of message dicts with 'role' and 'content'
+
+    Returns:
+        The JSON-encoded messages array
+    """
+    return orjson.dumps(messages)
+
+
+def build_payload_bytes(
+    model: str,
+    encoded_messages: bytes,
+    reasoning_config: Optional[Mapping[str, Any]] = None,
+    stream: bool = False
+) -> bytes:
+    """
+    Build the JSON request body around already-encoded messages.
+
+    Args:
+        model: OpenRouter model identifier
+        encoded_messages: Messages array as returned by encode_messages()
+        reasoning_config: Optional mapping with 'param_name' and 'value' keys
+        stream: Whether to ask OpenRouter to stream the reply as SSE
+
+    Returns:
+        The JSON-encoded request body
+    """
+    body = b'{"model":' + orjson.dumps(model) + b',"messages":' + encoded_messages
+    if reasoning_config:
+        # Splice in the reasoning parameter without its surrounding braces
+        reasoning = orjson.dumps({reasoning_config["param_name"]: reasoning_config["value"]})
+        body += b"," + reasoning[1:-1]
+    if stream:
+        body += b',"stream":true'
+    return body + b"}"
+
+
+async def _read_stream(
+    response: httpx.Response,
+    parts: List[str],
+    on_chunk: Callable[[str], None]
+) -> Optional[List[Any]]:
+    """
+    Consume an OpenRouter SSE completion stream.
+
+    Each content delta is appended to parts and passed to on_chunk as soon
+    as it arrives, so the reply never has to be buffered whole before the
+    caller sees it.
+
+    Args:
+        response: Open streaming response
+        parts: List that collects the content deltas
+        on_chunk: Called with each content delta
+
+    Returns:
+        The reasoning details sent alongside the content, or None
+    """
+    reasoning_details: List[Any] = []
+    async for line in response.aiter_lines():
+        # Skip blank separators and keep-alive comments (": OPENROUTER PROCESSING")
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        chunk = orjson.loads(data)
+        if "error" in chunk:
+            # Errors after the stream started arrive as a final event
+            raise RuntimeError(chunk["error"].get("message", "stream error"))
+        choices = chunk.get("choices")
+        if not choices:
+            continue
+        delta = choices[0].get("delta") or {}
+        text = delta.get("content")
+        if text:
+            parts.append(text)
+            on_chunk(text)
+        if delta.get("reasoning_details"):
+            reasoning_details.extend(delta["reasoning_details"])
+    return reasoning_details or None
 
 
 async def query_model(
     model: str,
     messages: List[Dict[str, Any]],
     timeout: float = 120.0,
-    config: Optional[Dict[str, Any]] = None
-) -> Optional[Dict[str, Any]]:
+    config: Optional[Dict[str, Any]] = None,
+    encoded_messages: Optional[bytes] = None,
+    has_images: Optional[bool] = None,
+    max_retries: int = 2,
+    on_chunk: Optional[Callable[[str], None]] = None
+) -> Optional[ModelResponse]:
     """
     Query a single model via OpenRouter API.
 
     Args:
         model: OpenRouter model identifier (e.g., "openai/gpt-4o")
         messages: List of message dicts with 'role' and 'content' (content can be string or multimodal array)
-        timeout: Request timeout in seconds
+        timeout: Overall time budget in seconds, shared by all attempts.
+            Each attempt gets whatever is left of it, and no retry starts
+            that would begin after it runs out.
+        config: Optional configuration snapshot used to resolve reasoning settings
+        encoded_messages: Optional pre-encoded form of messages (see encode_messages)
+        has_images: Whether messages carry images, if the caller already knows
+            (only used for logging; detected from messages when omitted)
+        max_retries: How many times to retry after a timeout or a transient
+            HTTP error (see RETRY_STATUS_CODES) before giving up
+        on_chunk: If given, the reply is streamed and this is called with
+            each content delta as it arrives (the full reply is still
+            returned). A request that fails after streaming part of its
+            reply is not retried, since the caller has already seen it.
 
     Returns:
-        Response dict with 'content' and optional 'reasoning_details', or None if failed
+        ModelResponse with the content and optional reasoning details, or None if failed
     """
-    headers = {
-        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-        "Content-Type": "application/json",
-    }
-
-    payload = {
-        "model": model,
-        "messages": messages,
-    }
+    if not messages:
+        logger.error(NO_MESSAGES_TMPL, model)
+        return None
 
     # Add reasoning configuration if available for this model
     reasoning_config = get_reasoning_config(model, config=config)
     if reasoning_config:
-        param_name = reasoning_config["param_name"]
-        param_value = reasoning_config["value"]
-        payload[param_name] = param_value
-        logger.info(f"{Colors.INFO}[{model}] Reasoning: {param_name}={param_value}{Colors.RESET}")
-
-    # Log request details
-    msg_preview = str(messages[0].get('content', ''))[:100] if messages else ''
-    has_images = any(
-        isinstance(m.get('content'), list) and 
-        any(c.get('type') == 'image_url' for c in m.get('content', []))
-        for m in messages
-    )
-    logger.info(f"{Colors.SEND}>>> [{model}] SENDING request (images: {has_images}, timeout: {timeout}s){Colors.RESET}")
-    logger.debug(f"[{model}] Message preview: {msg_preview}...")
-
-    start_time = time.time()
+        logger.info(REASONING_TMPL, model, reasoning_config["param_name"], reasoning_config["value"])
 
-    try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                OPENROUTER_API_URL,
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
+    # Log request details, skipping the work when the level is disabled
+    if logger.isEnabledFor(logging.INFO):
+        if has_images is None:
+            has_images = _has_images(messages)
+        logger.info(SEND_TMPL, model, has_images, timeout)
+    if logger.isEnabledFor(logging.DEBUG):
+        msg_preview = str(messages[0].get('content', ''))[:100] if messages else ''
+        logger.debug("[%s] Message preview: %s...", model, msg_preview)
+
+    if encoded_messages is None:
+        encoded_messages = encode_messages(messages)
+    body = build_payload_bytes(model, encoded_messages, reasoning_config, stream=on_chunk is not None)
 
-            elapsed = time.time() - start_time
-            data = response.json()
-            message = data['choices'][0]['message']
+    # The loop clock is monotonic, so elapsed times survive wall-clock jumps
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
+
+    deadline = start_time + timeout
+
+    for attempt in range(max_retries + 1):
+        # Content deltas received so far on a streamed attempt
+        parts: List[str] = []
+        try:
+            client = await get_client()
+            # A per-request timeout replaces the client's whole Timeout, so
+            # rebuild it with the short connect limit, capped by the budget
+            remaining = deadline - loop.time()
+            attempt_timeout = httpx.Timeout(remaining, connect=min(CONNECT_TIMEOUT, remaining))
+            if on_chunk is None:
+                response = await client.post(
+                    OPENROUTER_API_URL,
+                    content=body,
+                    timeout=attempt_timeout
+                )
+                response.raise_for_status()
+
+                data = orjson.loads(response.content)
+                message = data['choices'][0]['message']
+                content = message.get('content')
+                reasoning_details = message.get('reasoning_details')
+            else:
+                async with client.stream(
+                    "POST", OPENROUTER_API_URL, content=body, timeout=attempt_timeout
+                ) as response:
+                    if response.is_error:
+                        # Load the error body so it can be logged below
+                        await response.aread()
+                    response.raise_for_status()
+                    reasoning_details = await _read_stream(response, parts, on_chunk)
+                content = "".join(parts)
+
+            elapsed = loop.time() - start_time
 
             # Log response details
-            content_length = len(message.get('content', '') or '')
-            has_reasoning = message.get('reasoning_details') is not None
-            logger.info(f"{Colors.RECV}<<< [{model}] RECEIVED in {elapsed:.2f}s (chars: {content_length}, reasoning: {has_reasoning}){Colors.RESET}")
-
-            return {
-                'content': message.get('content'),
-                'reasoning_details': message.get('reasoning_details')
-            }
-
-    except httpx.TimeoutException:
-        elapsed = time.time() - start_time
-        logger.error(f"{Colors.ERROR}!!! [{model}] TIMEOUT after {elapsed:.2f}s{Colors.RESET}")
-        return None
-    except httpx.HTTPStatusError as e:
-        elapsed = time.time() - start_time
-        logger.error(f"{Colors.ERROR}!!! [{model}] HTTP {e.response.status_code} after {elapsed:.2f}s: {e.response.text[:200]}{Colors.RESET}")
-        return None
-    except Exception as e:
-        elapsed = time.time() - start_time
-        logger.error(f"{Colors.ERROR}!!! [{model}] ERROR after {elapsed:.2f}s: {type(e).__name__}: {e}{Colors.RESET}")
-        return None
+            content_length = len(content or '')
+            has_reasoning = reasoning_details is not None
+            logger.info(RECV_TMPL, model, elapsed, content_length, has_reasoning)
+
+            return ModelResponse(
+                content=content,
+                reasoning_details=reasoning_details
+            )
+
+        except httpx.TimeoutException:
+            elapsed = loop.time() - start_time
+            delay = _retry_delay(attempt)
+            if attempt == max_retries or parts or elapsed + delay >= timeout:
+                logger.error(TIMEOUT_TMPL, model, elapsed)
+                return None
+            logger.warning(RETRY_TMPL, model, "timeout", elapsed, delay, attempt + 1, max_retries)
+        except httpx.HTTPStatusError as e:
+            elapsed = loop.time() - start_time
+            status_code = e.response.status_code
+            delay = _retry_delay(attempt, e.response)
+            if (status_code not in RETRY_STATUS_CODES or attempt == max_retries
+                    or elapsed + delay >= timeout):
+                logger.error(HTTP_ERROR_TMPL, model, status_code, elapsed, e.response.text[:200])
+                return None
+            logger.warning(RETRY_TMPL, model, f"HTTP {status_code}", elapsed, delay, attempt + 1, max_retries)
+        except Exception as e:
+            elapsed = loop.time() - start_time
+            logger.error(ERROR_TMPL, model, elapsed, type(e).__name__, e)
+            return None
+
+        await asyncio.sleep(delay)
+
+
+async def query_models_streaming(
+    models: List[str],
+    messages: List[Dict[str, Any]],
+    config: Optional[Dict[str, Any]] = None,
+    max_concurrency: int = 32,
+    has_images: Optional[bool] = None,
+    stop_after: Optional[int] = None
+) -> AsyncIterator[Tuple[str, Optional[ModelResponse]]]:
+    """
+    Query multiple models in parallel, yielding each response as it arrives.
+
+    Requests still in flight are cancelled if the caller stops iterating
+    early (close the generator, e.g. with contextlib.aclosing, to make that
+    happen promptly).
+
+    The same messages object (including any base64 image data URLs) is
+    shared by every request and serialized once; it is never copied per
+    model, so callers must not mutate it while the fan-out runs.
+
+    Args:
+        models: List of OpenRouter model identifiers
+        messages: List of message dicts to send to each model (content can be string or multimodal array)
+        config: Optional configuration snapshot shared by all queries
+        max_concurrency: Maximum number of requests in flight at once
+        has_images: Whether messages carry images, if the caller already knows
+            (passed through to query_model for logging)
+        stop_after: Stop once this many models have answered successfully.
+            Every response that has already arrived by then is still
+            yielded; only requests still in flight are cancelled.
+
+    Yields:
+        (model, response) tuples in completion order; response is None if failed
+    """
+    if not models:
+        return
+
+    # Cap in-flight requests so large councils don't burst past the HTTP/2
+    # stream limit or the connection pool all at once
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    # Every model gets the same messages, so encode them once for all requests
+    encoded_messages = encode_messages(messages)
+    # Likewise detect images once rather than in every query_model call
+    if has_images is None and logger.isEnabledFor(logging.INFO):
+        has_images = _has_images(messages)
+
+    async def query_with_limit(model: str) -> Optional[ModelResponse]:
+        async with semaphore:
+            return await query_model(
+                model, messages, config=config, encoded_messages=encoded_messages,
+                has_images=has_images
+            )
+
+    tasks = {
+        asyncio.create_task(query_with_limit(model)): model
+        for model in models
+    }
+    try:
+        pending = set(tasks)
+        successful = 0
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                response = task.result()
+                if response is not None:
+                    successful += 1
+                yield tasks[task], response
+            if stop_after is not None and successful >= stop_after:
+                # Also hand over anything that finished while the caller
+                # was handling this batch, then cancel the rest
+                for task in [task for task in pending if task.done()]:
+                    yield tasks[task], task.result()
+                return
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
 async def query_models_parallel(
     models: List[str],
     messages: List[Dict[str, Any]],
-    config: Optional[Dict[str, Any]] = None
-) -> Dict[str, Optional[Dict[str, Any]]]:
+    config: Optional[Dict[str, Any]] = None,
+    max_concurrency: int = 32,
+    stop_after: Optional[int] = None
+) -> Dict[str, Optional[ModelResponse]]:
     """
-    Query multiple models in parallel.
+    Query multiple models in parallel and wait for all of them (or until
+    stop_after of them have answered).
 
     Args:
         models: List of OpenRouter model identifiers
         messages: List of message dicts to send to each model (content can be string or multimodal array)
+        config: Optional configuration snapshot shared by all queries
+        max_concurrency: Maximum number of requests in flight at once
+        stop_after: Optional number of successful answers after which the
+            remaining requests are cancelled (see query_models_streaming)
 
     Returns:
-        Dict mapping model identifier to response dict (or None if failed)
+        Dict mapping model identifier to ModelResponse (or None if failed
+        or cancelled)
     """
-    import asyncio
-
-    logger.info(f"{Colors.INFO}{'='*60}{Colors.RESET}")
-    logger.info(f"{Colors.INFO}Querying {len(models)} models in parallel{Colors.RESET}")
-    start_time = time.time()
+    if not models:
+        return {}
 
-    # Create tasks for all models
-    tasks = [query_model(model, messages, config=config) for model in models]
+    logger.info(BANNER_TMPL)
+    logger.info(PARALLEL_START_TMPL, len(models))
+    loop = asyncio.get_running_loop()
+    start_time = loop.time()
 
-    # Wait for all to complete
-    responses = await asyncio.gather(*tasks)
+    responses = {}
+    successful = 0
+    async for model, response in query_models_streaming(
+        models, messages, config=config, max_concurrency=max_concurrency,
+        stop_after=stop_after
+    ):
+        responses[model] = response
+        if response is not None:
+            successful += 1
+        logger.debug(PARALLEL_PROGRESS_TMPL, len(responses), len(models), model, successful)
 
-    elapsed = time.time() - start_time
-    successful = sum(1 for r in responses if r is not None)
-    logger.info(f"{Colors.INFO}Parallel query complete in {elapsed:.2f}s ({successful}/{len(models)} succeeded){Colors.RESET}")
-    logger.info(f"{Colors.INFO}{'='*60}{Colors.RESET}")
+    elapsed = loop.time() - start_time
+    logger.info(PARALLEL_DONE_TMPL, elapsed, successful, len(models))
+    logger.info(BANNER_TMPL)
 
-    # Map models to their responses
-    return {model: response for model, response in zip(models, responses)}
+    # Keep the council's model order, which fixes the Stage 2 response labels
+    return {model: responses.get(model) for model in models}
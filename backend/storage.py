@@ -73,9 +73,13 @@ def save_conversation(conversation: Dict[str, Any]):
     """
     ensure_data_dir()
 
+    # Write to a temp file and swap it in, so a crash mid-write never
+    # leaves a truncated conversation behind
     path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
         json.dump(conversation, f, indent=2)
+    os.replace(tmp_path, path)
 
 
 def list_conversations() -> List[Dict[str, Any]]:
@@ -107,44 +111,21 @@ def list_conversations() -> List[Dict[str, Any]]:
     return conversations
 
 
-def add_user_message(conversation_id: str, content: str, images: Optional[List[str]] = None):
-    """
-    Add a user message to a conversation.
-
-    Args:
-        conversation_id: Conversation identifier
-        content: User message content
-        images: Optional list of base64 image data URLs
-    """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    message = {
-        "role": "user",
-        "content": content
-    }
-    
-    # Include images if present
-    if images:
-        message["images"] = images
-
-    conversation["messages"].append(message)
-
-    save_conversation(conversation)
-
-
-def add_assistant_message(
+def add_turn(
     conversation_id: str,
+    content: str,
+    images: Optional[List[str]],
     stage1: List[Dict[str, Any]],
     stage2: List[Dict[str, Any]],
     stage3: Dict[str, Any]
 ):
     """
-    Add an assistant message with all 3 stages to a conversation.
+    Add a user message and its assistant reply to a conversation in one write.
 
     Args:
         conversation_id: Conversation identifier
+        content: User message content
+        images: Optional list of base64 image data URLs
         stage1: List of individual model responses
         stage2: List of model rankings
         stage3: Final synthesized response
@@ -153,6 +134,16 @@ def add_assistant_message(
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
+    user_message = {
+        "role": "user",
+        "content": content
+    }
+
+    # Include images if present
+    if images:
+        user_message["images"] = images
+
+    conversation["messages"].append(user_message)
     conversation["messages"].append({
         "role": "assistant",
         "stage1": stage1,
@@ -93,6 +93,9 @@ function App() {
         messages: [...prev.messages, assistantMessage],
       }));
 
+      // Chairman's answer so far, built up from stage3_chunk deltas
+      let stage3Text = '';
+
       // Send message with streaming (including images)
       await api.sendMessageStream(currentConversationId, content, images, (eventType, event) => {
         switch (eventType) {
@@ -119,8 +122,9 @@ function App() {
               lastMsg.stage1PendingModels = (lastMsg.stage1PendingModels || [])
                 .filter(m => m !== modelName);
               
-              // Add response if it didn't fail and isn't already present (prevent duplicates)
-              if (!event.data.failed) {
+              // Add response if it didn't fail, wasn't cancelled after the
+              // quorum and isn't already present (prevent duplicates)
+              if (!event.data.failed && !event.data.cancelled) {
                 const existingModels = (lastMsg.stage1 || []).map(r => r.model);
                 if (!existingModels.includes(modelName)) {
                   lastMsg.stage1 = [...(lastMsg.stage1 || []), event.data];
@@ -204,6 +208,24 @@ function App() {
             });
             break;
 
+          case 'stage3_chunk': {
+            // Accumulate outside the updater so it stays idempotent (React
+            // may call it twice) and assign the full text
+            stage3Text += event.data.delta;
+            const stage3 = { model: event.data.model, response: stage3Text };
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              messages[messages.length - 1] = {
+                ...lastMsg,
+                stage3,
+                loading: { ...lastMsg.loading, stage3: false },
+              };
+              return { ...prev, messages };
+            });
+            break;
+          }
+
           case 'stage3_complete':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];